@@ -1,7 +1,114 @@
-import numpy_financial as npf
+from functools import lru_cache
+
 import numpy as np
 
+from enliten import _fin as npf
+from enliten._fin import njit, prange
+
+# Fast-math flags for the cash-flow kernels. Everything except 'nnan' and 'ninf', so nan and inf
+# inputs still propagate instead of being undefined behaviour.
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+def _whole_years(value, name):
+    """
+    Period in years as an int, raising ValueError if it is not a whole number of years.
+    """
+    years = int(value)
+    if years != value:
+        raise ValueError(f"{name} must be a whole number of years, got {value!r}")
+    return years
+
+
+def _augment_years(system_augment, years):
+    """
+    system_augment as float64 with its last axis cut or zero-padded to cover years 0 through years - 1.
+    """
+    system_augment = np.atleast_1d(np.asarray(system_augment, dtype=np.float64))[..., :years]
+    missing = years - system_augment.shape[-1]
+    if missing > 0:
+        system_augment = np.pad(system_augment, [(0, 0)] * (system_augment.ndim - 1) + [(0, missing)])
+    return system_augment
+
+
+@lru_cache(maxsize=64)
+def _escalation_factors(esc, analysis_period):
+    """
+    Read-only escalation factors (1 + esc)**v for years v = 1 through analysis_period.
+    """
+    factors = np.power(1.0 + esc, np.arange(1, analysis_period + 1))
+    factors.flags.writeable = False  # Shared between calls through the cache
+    return factors
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _run_cashflow(annual_OM_VOM, annual_electricity_sales, annual_electricity_purchases, system_augment, depreciation_values, tax, insurance, property_tax, capex_net, initial_investment, analysis_period):
+    """
+    Year-by-year C&E analysis, rolling unused depreciation into the following year.
+
+    Parameters:
+    - Yearly float64 arrays of length analysis_period + 1 and scalar rates, see calculate_lcoe_metrics
+    - capex_net: System capital expenditure net of grants. [USD]
+    - initial_investment: Equity investment in year 0. [USD]
+
+    Returns:
+    - series: Array of shape (6, analysis_period + 1) with rows revenues, costs, other_tax,
+      taxable_income_array, taxes_array and annual_cash_flow.
+    """
+    series = np.zeros((6, analysis_period + 1), dtype=np.float64)
+    series[5, 0] = -initial_investment
+    fixed_other_tax = (insurance + property_tax) * capex_net  # Insurance and property tax are the same every year
+    series[2, 1:] = fixed_other_tax
+    unused_depreciation = 0.0  # Initialize unused depreciation rollover
+
+    for v in range(1, analysis_period + 1):
+        OM_esc = annual_OM_VOM[v]
+        ebit = annual_electricity_sales[v] - (
+            OM_esc + annual_electricity_purchases[v] + system_augment[v]
+        )
+        depreciation = depreciation_values[v] + unused_depreciation  # Add unused depreciation from previous iteration
+        income_after_depreciation = ebit - depreciation
+        taxable_income = max(0.0, income_after_depreciation)
+
+        # Rollover the excess depreciation, zero if none is left
+        unused_depreciation = max(0.0, -income_after_depreciation)
+
+        taxes = taxable_income * tax
+        net_income = ebit - taxes - fixed_other_tax
+
+        series[0, v] = annual_electricity_sales[v]
+        series[1, v] = OM_esc + annual_electricity_purchases[v] + system_augment[v]
+        series[3, v] = taxable_income
+        series[4, v] = taxes
+        series[5, v] = net_income
+
+    return series
+
+
+@njit(cache=True, parallel=True, fastmath=_FASTMATH)
+def _run_cashflow_batch(annual_OM_VOM, annual_electricity_sales, annual_electricity_purchases, system_augment, depreciation_values, tax, insurance, property_tax, capex_net, initial_investment, analysis_period):
+    """
+    _run_cashflow applied to each row of 2-D yearly arrays and 1-D scalar parameters, in parallel.
+
+    Returns:
+    - series: Array of shape (K, 6, analysis_period + 1), see _run_cashflow.
+    """
+    series = np.empty((annual_OM_VOM.shape[0], 6, analysis_period + 1), dtype=np.float64)
+    for k in prange(annual_OM_VOM.shape[0]):
+        series[k] = _run_cashflow(
+            annual_OM_VOM[k], annual_electricity_sales[k], annual_electricity_purchases[k], system_augment[k],
+            depreciation_values[k], tax[k], insurance[k], property_tax[k], capex_net[k], initial_investment[k], analysis_period
+        )
+    return series
+
+
 class LCOECalculator:
+    __slots__ = (
+        'system_capex_USD', 'system_annual_OM_USD', 'system_annual_VOM_USD', 'system_to_load_annual_MWh_e',
+        'system_augment', 'ITC', 'DF', 'COE', 'I', 'grant_percentage', 'tax', 'inflation', 'property_tax',
+        'insurance', 'depreciation_period', 'esc', 'analysis_period', 'VOM', 'e_sale',
+    )
+
     def __init__(self, system_capex_USD, system_annual_OM_USD, system_annual_VOM_USD, system_to_load_annual_MWh_e, system_augment, ITC = 0.5, DF = 0.5, COE = 0.13, I = 0.08, grant_percentage = 0, tax = 0.257, inflation = 0.028, property_tax = 0.0084, insurance = 0.004, depreciation_period = 5, esc = 0.028, analysis_period = 30, VOM = 0.003, e_sale = 0.07):
 
         """
@@ -22,7 +129,7 @@ class LCOECalculator:
             Annual renewable energy production. [MWh]
         
         system_augment (list)
-            Additional system costs over the analysis period. [USD]
+            Additional system costs over the analysis period, starting at year 0. Missing years are zero. [USD]
         
         ITC : float
             Investment Tax Credit. [%]
@@ -71,7 +178,8 @@ class LCOECalculator:
         self.system_annual_OM_USD = system_annual_OM_USD
         self.system_annual_VOM_USD = system_annual_VOM_USD
         self.system_to_load_annual_MWh_e = system_to_load_annual_MWh_e   
-        self.system_augment = system_augment
+        # Stored as contiguous float64, missing years are zero-padded once the analysis period is resolved
+        self.system_augment = np.ascontiguousarray(system_augment, dtype=np.float64)
         self.ITC = ITC
         self.DF = DF
         self.COE = COE
@@ -99,16 +207,16 @@ class LCOECalculator:
         Returns:
         - Augmented array with length L.
         """
-        arr_with_zero = np.insert(arr, 0, 0)  # Insert a zero at the beginning of the array
-        l_val = arr_with_zero.size
+        arr = np.asarray(arr)
+        l_val = arr.size + 1  # Length once a zero is inserted at the beginning of the array
+        head = min(L, l_val)
+        augmented_array = np.empty(L, dtype=arr.dtype)
+        augmented_array[:1] = 0
+        augmented_array[1:head] = arr[:max(head - 1, 0)]
         if L > l_val:
-            shortfall = L - l_val
-            repeat_times = (shortfall + l_val - 1) // l_val
-            repeated_section = np.tile(arr_with_zero, (repeat_times,))[-shortfall:]
-            augmented_array = np.concatenate((arr_with_zero, repeated_section))
-            return augmented_array
-        else:
-            return arr_with_zero[:L]
+            # Fill the shortfall from the zero-padded array repeated end to end, keeping its last values
+            augmented_array[l_val:] = augmented_array[(np.arange(l_val, L) - L) % l_val]
+        return augmented_array
     
     def calculate_depreciation(self, analysis_period = None, system_capex_USD = None, inflation = None, depreciation_period = None, ITC = None):
 
@@ -119,10 +227,10 @@ class LCOECalculator:
         - Certain class variables
 
         Returns:
-        depreciation_values: List
+        depreciation_values: np.ndarray
             Depreciation values for each year. [$]
             
-        depreciable_fractions: List
+        depreciable_fractions: np.ndarray
             Depreciable fractions for each year. [%]
         """
 
@@ -138,27 +246,35 @@ class LCOECalculator:
         if ITC == None:
             ITC = self.ITC
         
-        # Variables for calculations
-        adjusted_depreciable_base = system_capex_USD * (1 - ITC / 2)
+        return self._depreciation(analysis_period, system_capex_USD, inflation, depreciation_period, ITC)
+
+    @staticmethod
+    def _depreciation(analysis_period, system_capex_USD, inflation, depreciation_period, ITC):
+        """
+        Depreciation values and fractions for fully specified parameters, see calculate_depreciation.
+
+        system_capex_USD, inflation and ITC may also be arrays of shape (K,), the results then
+        have shape (K, analysis_period + 1).
+        """
+        depreciation_period = _whole_years(depreciation_period, 'depreciation_period')
+
+        # Variables for calculations, with a trailing year axis
+        adjusted_depreciable_base = np.asarray(system_capex_USD * (1 - ITC / 2), dtype=np.float64)[..., None]
+        inflation = np.asarray(inflation, dtype=np.float64)[..., None]
         straight_line_rate = 1 / depreciation_period
         double_declining_rate = 2 * straight_line_rate
-        depreciation_values = [0]  # Year 0 has no depreciation
-        depreciable_fractions = [0]  # Year 0 fraction is 0
-        remaining_book_value = adjusted_depreciable_base
-
-        # Calculates depreciation values and fractions
-        for v in range(1, analysis_period + 1):
-            if v <= depreciation_period:
-                current_depreciation = remaining_book_value * double_declining_rate
-                current_depreciation = min(current_depreciation, remaining_book_value)
-                constant_depreciation = current_depreciation * (1 - inflation)**v
-                depreciation_values.append(constant_depreciation)
-                depreciable_fraction = constant_depreciation / adjusted_depreciable_base
-                depreciable_fractions.append(depreciable_fraction)
-                remaining_book_value -= current_depreciation
-            else:
-                depreciation_values.append(0)
-                depreciable_fractions.append(0)
+        shape = adjusted_depreciable_base.shape[:-1] + (analysis_period + 1,)
+        depreciation_values = np.zeros(shape, dtype=np.float64)  # Year 0 has no depreciation
+        depreciable_fractions = np.zeros(shape, dtype=np.float64)  # Year 0 fraction is 0
+
+        # Calculates depreciation values and fractions in closed form. The
+        # book value declines geometrically, and clamping the decline factor
+        # at zero keeps the book value from going negative.
+        years = np.arange(1, min(depreciation_period, analysis_period) + 1)
+        remaining_book_value = adjusted_depreciable_base * np.power(max(1 - double_declining_rate, 0), years - 1)
+        current_depreciation = np.minimum(remaining_book_value * double_declining_rate, remaining_book_value)
+        depreciation_values[..., years] = current_depreciation * np.power(1 - inflation, years)
+        depreciable_fractions[..., years] = depreciation_values[..., years] / adjusted_depreciable_base
 
         return depreciation_values, depreciable_fractions
 
@@ -216,47 +332,79 @@ class LCOECalculator:
         if e_sale is None:
             e_sale = self.e_sale      
         
+        depreciation_period = _whole_years(depreciation_period, 'depreciation_period')
+        analysis_period = _whole_years(analysis_period, 'analysis_period')
+        system_augment = _augment_years(system_augment, analysis_period + 1)
+
+        # Round to 1e-12 so that repeated, near-equal parameter sets share cached results
+        def key(value):
+            return round(np.asarray(value, dtype=np.float64).item(), 12)
+
+        metrics = self._lcoe_metrics(
+            key(system_capex_USD), key(system_annual_OM_USD), key(system_annual_VOM_USD), key(system_to_load_annual_MWh_e),
+            tuple(key(value) for value in system_augment), key(ITC), key(DF), key(COE), key(I),
+            key(grant_percentage), key(tax), key(inflation), key(property_tax), key(insurance), depreciation_period,
+            key(esc), analysis_period, key(VOM), key(e_sale)
+        )
+        return dict(metrics)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _lcoe_metrics(system_capex_USD, system_annual_OM_USD, system_annual_VOM_USD, system_to_load_annual_MWh_e, system_augment, ITC, DF, COE, I, grant_percentage, tax, inflation, property_tax, insurance, depreciation_period, esc, analysis_period, VOM, e_sale):
+
+        """
+        LCOE metrics for fully specified, hashable parameters, see calculate_lcoe_metrics.
+
+        Results are cached on the parameter values, system_augment must be a tuple.
+        """
+
         metrics = {}
 
+        system_augment = np.array(system_augment, dtype=np.float64)
+        if system_augment.size < analysis_period + 1:
+            raise ValueError("system_augment must provide a value for years 0 through analysis_period")
+
         # Discount Rate Setup
         WACC_n = DF * I * (1 - tax) + (1 - DF) * COE
         WACC_r = ((1 + WACC_n) / (1 + inflation)) - 1        
         CRF = WACC_r / (1 - (1 + WACC_r)**(-analysis_period))
 
-        # Annual O&M and VOM costs
-        annual_OM = np.array([system_annual_OM_USD * ((1 + esc)**(v + 1)) for v in range(analysis_period)])
-        annual_OM = np.insert(annual_OM, 0, 0)
-        annual_VOM = np.array([system_annual_VOM_USD * ((1 + esc)**(v + 1)) for v in range(analysis_period)])
-        annual_VOM = np.insert(annual_VOM, 0, 0)
+        # Discount factors for years 0 through analysis_period, every NPV below is a dot product
+        # of a yearly series with them, the same result as npf.npv(WACC_r, series)
+        discount_factors = np.power(1.0 + WACC_r, -np.arange(analysis_period + 1))
+
+        # NPV of a constant 1 USD per year over years 1 through analysis_period
+        annuity_factor = discount_factors[1:].sum()
+
+        # Escalation factors for years 1 through analysis_period, shared by the escalated series
+        esc_factors = _escalation_factors(esc, analysis_period)
+
+        # Annual O&M and VOM costs share their escalation, so the C&E analysis only needs their sum
+        annual_OM_VOM = np.empty(analysis_period + 1, dtype=np.float64)
+        annual_OM_VOM[0] = 0
+        annual_OM_VOM[1:] = (system_annual_OM_USD + system_annual_VOM_USD) * esc_factors
         
-        # Annual electricity purchases
-        annual_electricity_purchases = np.array(0) + np.array(0)
-        metrics['annual_electricity_purchases_USD'] = annual_electricity_purchases
-        annual_electricity_purchases = np.array([annual_electricity_purchases * ((1 + esc)**(v + 1)) for v in range(analysis_period)])
-        annual_electricity_purchases = np.insert(annual_electricity_purchases,0,0)
-
-        # Renewable energy production
-        annual_renewables = np.array(system_to_load_annual_MWh_e) * 1000
-        annual_renewables = [annual_renewables.item()]
-        annual_renewables = np.ones_like(range(analysis_period)) * annual_renewables
-        annual_renewables = np.insert(annual_renewables, 0, 0)
-
-        # Annual electricity sales
-        annual_electricity_sales = np.array(system_to_load_annual_MWh_e) * 1000 * e_sale
-        metrics['annual_electricity_sales_USD'] = annual_electricity_sales
-        annual_electricity_sales = np.array([annual_electricity_sales * ((1 + 0)**(v + 1)) for v in range(analysis_period)])
-        annual_electricity_sales = np.insert(annual_electricity_sales, 0, 0)
+        # Annual electricity purchases, none are made so the series is zero
+        metrics['annual_electricity_purchases_USD'] = 0.0
+        annual_electricity_purchases = np.zeros(analysis_period + 1, dtype=np.float64)
+
+        # Renewable energy production, constant in years 1 through analysis_period [kWh]
+        annual_renewables_kWh = float(system_to_load_annual_MWh_e) * 1000.0
+
+        # Annual electricity sales (not escalated, so the series is constant)
+        electricity_sales_USD = annual_renewables_kWh * e_sale
+        metrics['annual_electricity_sales_USD'] = electricity_sales_USD
+        annual_electricity_sales = np.empty(analysis_period + 1, dtype=np.float64)
+        annual_electricity_sales[0] = 0
+        annual_electricity_sales[1:] = electricity_sales_USD
 
         # Depreciation
-        depreciation_values, depreciable_fractions = self.calculate_depreciation(
+        depreciation_values, depreciable_fractions = LCOECalculator._depreciation(
             analysis_period, system_capex_USD * (1 - grant_percentage), inflation, depreciation_period, ITC
         )
 
         # Calculate Present Value of Depreciation (PVD)
-        PVD = sum([
-            depreciable_fractions[n] / (1 + WACC_r)**(n)
-            for n in range(0, depreciation_period + 1)
-        ])
+        PVD = depreciable_fractions[:depreciation_period + 1] @ discount_factors[:depreciation_period + 1]
 
         # Calculate After-Tax Deduction Fixed Charge Rate (FCR)
         FCR_after_tax_deduction = (
@@ -272,13 +420,14 @@ class LCOECalculator:
         ) / (1 - tax)
 
         # Net Present Values (NPV)
-        NPV_OM_N = npf.npv(WACC_r, annual_OM[:analysis_period + 1])
-        NPV_VOM_N = npf.npv(WACC_r, annual_VOM[:analysis_period + 1])
-        NPV_depreciation = npf.npv(WACC_r, depreciation_values)
-        NPV_Energy_N = npf.npv(WACC_r, annual_renewables[:analysis_period + 1])
-        NPV_electricity_sales_N = npf.npv(WACC_r, annual_electricity_sales[:analysis_period + 1])
-        NPV_electricity_purchases_N = npf.npv(WACC_r, annual_electricity_purchases[:analysis_period + 1])
-        NPV_system_augment_N = npf.npv(WACC_r, system_augment[:analysis_period + 1])
+        escalated_annuity_factor = esc_factors @ discount_factors[1:]  # NPV of 1 USD per year escalated at esc
+        NPV_OM_N = system_annual_OM_USD * escalated_annuity_factor
+        NPV_VOM_N = system_annual_VOM_USD * escalated_annuity_factor
+        NPV_depreciation = depreciation_values @ discount_factors
+        NPV_Energy_N = annual_renewables_kWh * annuity_factor
+        NPV_electricity_sales_N = annual_electricity_sales @ discount_factors
+        NPV_electricity_purchases_N = 0.0
+        NPV_system_augment_N = system_augment @ discount_factors
 
 
         # Annualized costs
@@ -297,45 +446,18 @@ class LCOECalculator:
         annual_ARR_AT = (annualized_CAPEX_AT + annualized_OM_AT + annualized_VOM_AT + annualized_electricity_purchases_AT + annualized_system_augment_AT)
         annual_ARR_BT = (annualized_CAPEX_BT + annualized_OM_BT + annualized_VOM_BT + annualized_electricity_purchases_BT + annualized_system_augment_BT)
 
-        # Track revenues, costs, and taxes
-        revenues = [0]
-        costs = [0]
-        other_tax = [0]
-        taxable_income_array = [0]
-        taxes_array = [0]
-        annual_cash_flow = [-(system_capex_USD * (1 - ITC) * (1 - grant_percentage))]  # Initial equity investment
-        unused_depreciation = 0  # Initialize unused depreciation rollover
-
         # C&E Analysis
-        for v in range(1, analysis_period + 1):
-            OM_esc = annual_OM[v] + annual_VOM[v]
-            ebit = (annual_electricity_sales[v]) - (
-                OM_esc + annual_electricity_purchases[v] + system_augment[v]
-            )
-            depreciation = depreciation_values[v] + unused_depreciation  # Add unused depreciation from previous iteration
-            taxable_income = max(0, ebit - depreciation)
-            
-            # Calculate unused depreciation for rollover
-            if ebit - depreciation < 0:
-                unused_depreciation = abs(ebit - depreciation)  # Rollover the excess depreciation
-            else:
-                unused_depreciation = 0  # Reset unused depreciation if none is left
-            
-            taxes = taxable_income * tax
-            net_income = ebit - taxes - (insurance * system_capex_USD * (1 - grant_percentage) + property_tax * system_capex_USD * (1 - grant_percentage))
-            
-            revenues.append(annual_electricity_sales[v])
-            costs.append(OM_esc + annual_electricity_purchases[v]+ system_augment[v]
-            )
-            other_tax.append(insurance * system_capex_USD * (1 - grant_percentage) + property_tax * system_capex_USD * (1 - grant_percentage))
-            taxes_array.append(taxes)
-            taxable_income_array.append(taxable_income)
-            annual_cash_flow.append(net_income)
+        capex_net = float(system_capex_USD * (1 - grant_percentage))
+        revenues, costs, other_tax, taxable_income_array, taxes_array, annual_cash_flow = _run_cashflow(
+            annual_OM_VOM, annual_electricity_sales, annual_electricity_purchases, system_augment,
+            depreciation_values, float(tax), float(insurance),
+            float(property_tax), capex_net, capex_net * (1 - ITC), int(analysis_period)
+        )
 
         # Calculate IRR and TLCC    
-        NPV_costs = npf.npv(WACC_r, costs)
-        NPV_other_tax = npf.npv(WACC_r, other_tax)
-        NPV_cash_flow = npf.npv(WACC_r, annual_cash_flow)
+        NPV_costs = costs @ discount_factors
+        NPV_other_tax = other_tax @ discount_factors
+        NPV_cash_flow = annual_cash_flow @ discount_factors
         IRR = npf.irr(annual_cash_flow)
         
         # Total Lifecycle Costs (TLCC)
@@ -346,30 +468,22 @@ class LCOECalculator:
         LCOE_after_tax = after_tax_TLCC / NPV_Energy_N
         LCOE_before_tax = before_tax_TLCC / NPV_Energy_N
 
-        # LCOE calculation
-        ARR_AT_array = [0] + [annual_ARR_AT] * analysis_period
-        ARR_BT_array = [0] + [annual_ARR_BT] * analysis_period
-        
-        # Calculate NPV for ARR_AT and ARR_BT
-        NPV_ARR_AT = npf.npv(WACC_r, ARR_AT_array)        
+        # LCOE calculation, ARR_AT and ARR_BT are constant over years 1 through analysis_period
+        NPV_ARR_AT = annual_ARR_AT * annuity_factor
         LCOE_real_USD_kWh_AT = NPV_ARR_AT / NPV_Energy_N      
-        NPV_ARR_BT = npf.npv(WACC_r, ARR_BT_array)
+        NPV_ARR_BT = annual_ARR_BT * annuity_factor
         LCOE_real_USD_kWh_BT = NPV_ARR_BT / NPV_Energy_N
     
         # Initial investment (negative cash flow in year 0)
         initial_investment = -annual_cash_flow[0]
         
-        # Calculate cumulative cash flow
-        cumulative_cash_flow = [0]  # Start with year 0
-        for cash_flow in annual_cash_flow[1:]:  # Skip the initial investment
-            cumulative_cash_flow.append(cumulative_cash_flow[-1] + cash_flow)
+        # Calculate cumulative cash flow, starting with year 0
+        cumulative_cash_flow = np.zeros(annual_cash_flow.size, dtype=np.float64)
+        np.cumsum(annual_cash_flow[1:], out=cumulative_cash_flow[1:])  # Skip the initial investment
         
-        # Calculate payback period
-        payback_period = None
-        for year, cash in enumerate(cumulative_cash_flow):
-            if cash >= initial_investment:
-                payback_period = year
-                break
+        # Calculate payback period as the first year the investment is recovered
+        recovered = cumulative_cash_flow >= initial_investment
+        payback_period = int(np.argmax(recovered)) if recovered.any() else None
         
         metrics['PVD'] = PVD
         metrics['FCR_AT'] = FCR_after_tax_deduction
@@ -380,4 +494,190 @@ class LCOECalculator:
         metrics['payback_period'] = payback_period
         metrics['LCOE_real_USD_kWh_BT'] = LCOE_real_USD_kWh_BT
         metrics['LCOE_real_USD_kWh_AT'] = LCOE_real_USD_kWh_AT
-        return metrics
\ No newline at end of file
+        return metrics
+
+    def calculate_lcoe_metrics_batch(self, system_capex_USD = None, system_annual_OM_USD = None, system_annual_VOM_USD = None, system_to_load_annual_MWh_e = None, system_augment = None, ITC = None, DF = None, COE = None, I = None, grant_percentage = None, tax  = None, inflation = None, property_tax = None, insurance = None, depreciation_period = None, esc = None, analysis_period = None, VOM = None, e_sale = None):
+
+        """
+        Calculate LCOE metrics for many parameter sets in one pass, e.g. for Monte Carlo sweeps.
+
+        Parameters:
+        - Same as class. Float parameters may be scalars or 1-D arrays of length K and are
+          broadcast against each other. system_augment may be one series shared by all sets or
+          an array of shape (K, analysis_period + 1), whose rows also set K. depreciation_period
+          and analysis_period must be scalars.
+
+        Returns:
+        - metrics: 
+            Dictionary with the same LCOE metrics as calculate_lcoe_metrics, each an array of
+            shape (K,). payback_period is nan where the investment is never recovered.
+        """
+
+        if system_capex_USD is None:
+            system_capex_USD = self.system_capex_USD
+        if system_annual_OM_USD is None:
+            system_annual_OM_USD = self.system_annual_OM_USD
+        if system_annual_VOM_USD is None:
+            system_annual_VOM_USD = self.system_annual_VOM_USD
+        if system_to_load_annual_MWh_e is None:
+            system_to_load_annual_MWh_e = self.system_to_load_annual_MWh_e
+        if system_augment is None:
+            system_augment = self.system_augment
+        if ITC is None:
+            ITC = self.ITC
+        if DF is None:
+            DF = self.DF
+        if COE is None:
+            COE = self.COE
+        if I is None:
+            I = self.I
+        if grant_percentage is None:
+            grant_percentage = self.grant_percentage
+        if tax is None:
+            tax = self.tax
+        if inflation is None:
+            inflation = self.inflation
+        if property_tax is None:
+            property_tax = self.property_tax
+        if insurance is None:
+            insurance = self.insurance
+        if depreciation_period is None:
+            depreciation_period = self.depreciation_period
+        if esc is None:
+            esc = self.esc
+        if analysis_period is None:
+            analysis_period = self.analysis_period
+        if VOM is None:
+            VOM = self.VOM
+        if e_sale is None:
+            e_sale = self.e_sale
+
+        depreciation_period = _whole_years(depreciation_period, 'depreciation_period')
+        analysis_period = _whole_years(analysis_period, 'analysis_period')
+        T = analysis_period + 1
+
+        system_augment = _augment_years(system_augment, T)
+        if system_augment.ndim > 2:
+            raise ValueError("system_augment must be a 1-D series or a 2-D array with one series per row")
+        parameters = [
+            np.atleast_1d(np.asarray(value, dtype=np.float64)) for value in (
+                system_capex_USD, system_annual_OM_USD, system_annual_VOM_USD, system_to_load_annual_MWh_e, ITC, DF,
+                COE, I, grant_percentage, tax, inflation, property_tax, insurance, esc, VOM, e_sale
+            )
+        ]
+        if any(value.ndim != 1 for value in parameters):
+            raise ValueError("Parameters must be scalars or 1-D arrays")
+
+        # The number of parameter sets K comes from the float parameters and the rows of system_augment
+        try:
+            (K,) = np.broadcast_shapes(*(value.shape for value in parameters), system_augment.shape[:-1])
+        except ValueError:
+            raise ValueError(
+                "Parameter arrays and the rows of system_augment must have the same length K, or length 1"
+            ) from None
+        (system_capex_USD, system_annual_OM_USD, system_annual_VOM_USD, system_to_load_annual_MWh_e, ITC, DF, COE, I,
+         grant_percentage, tax, inflation, property_tax, insurance, esc, VOM, e_sale) = (
+            np.broadcast_to(value, (K,)) for value in parameters
+        )
+        system_augment = np.ascontiguousarray(np.broadcast_to(system_augment, (K, T)))
+
+        metrics = {}
+
+        # Discount Rate Setup, with one row of discount factors per parameter set
+        WACC_n = DF * I * (1 - tax) + (1 - DF) * COE
+        WACC_r = ((1 + WACC_n) / (1 + inflation)) - 1
+        CRF = WACC_r / (1 - (1 + WACC_r)**(-analysis_period))
+        discount_factors = np.power(1.0 + WACC_r[:, None], -np.arange(T))
+
+        def npv(values):
+            # Row-wise NPV of a (K, T) array, see calculate_lcoe_metrics
+            return (values * discount_factors[:, :values.shape[-1]]).sum(axis=-1)
+
+        annuity_factor = discount_factors[:, 1:].sum(axis=-1)
+        esc_factors = np.power(1.0 + esc[:, None], np.arange(1, T))
+
+        # Annual O&M and VOM costs share their escalation, so the C&E analysis only needs their sum
+        annual_OM_VOM = np.zeros((K, T), dtype=np.float64)
+        annual_OM_VOM[:, 1:] = (system_annual_OM_USD + system_annual_VOM_USD)[:, None] * esc_factors
+
+        # Annual electricity purchases, none are made so the series is zero
+        metrics['annual_electricity_purchases_USD'] = np.zeros(K, dtype=np.float64)
+        annual_electricity_purchases = np.zeros((K, T), dtype=np.float64)
+
+        # Renewable energy production, constant in years 1 through analysis_period [kWh]
+        annual_renewables_kWh = system_to_load_annual_MWh_e * 1000.0
+
+        # Annual electricity sales (not escalated, so the series is constant)
+        electricity_sales_USD = annual_renewables_kWh * e_sale
+        metrics['annual_electricity_sales_USD'] = electricity_sales_USD
+        annual_electricity_sales = np.zeros((K, T), dtype=np.float64)
+        annual_electricity_sales[:, 1:] = electricity_sales_USD[:, None]
+
+        # Depreciation
+        depreciation_values, depreciable_fractions = LCOECalculator._depreciation(
+            analysis_period, system_capex_USD * (1 - grant_percentage), inflation, depreciation_period, ITC
+        )
+        PVD = npv(depreciable_fractions[:, :depreciation_period + 1])
+
+        # Fixed Charge Rates (FCR)
+        FCR_after_tax_deduction = (
+            CRF * (1 - tax * PVD * (1 - ITC / 2) - ITC) +
+            insurance * (1 - tax) +
+            property_tax * (1 - tax)
+        )
+        FCR_before_tax_revenue_required = (
+            CRF * (1 - tax * PVD * (1 - ITC / 2) - ITC) +
+            insurance + property_tax
+        ) / (1 - tax)
+
+        # Net Present Values (NPV)
+        escalated_annuity_factor = (esc_factors * discount_factors[:, 1:]).sum(axis=-1)
+        NPV_OM_N = system_annual_OM_USD * escalated_annuity_factor
+        NPV_VOM_N = system_annual_VOM_USD * escalated_annuity_factor
+        NPV_Energy_N = annual_renewables_kWh * annuity_factor
+        NPV_system_augment_N = npv(system_augment)
+
+        # Annual revenue requirements, electricity purchases are zero
+        annual_ARR_AT = (
+            (1 - grant_percentage) * system_capex_USD * FCR_after_tax_deduction +
+            (NPV_OM_N + NPV_VOM_N + NPV_system_augment_N) * CRF * (1 - tax)
+        )
+        annual_ARR_BT = (
+            (1 - grant_percentage) * system_capex_USD * FCR_before_tax_revenue_required +
+            (NPV_OM_N + NPV_VOM_N + NPV_system_augment_N) * CRF
+        )
+
+        # C&E Analysis
+        capex_net = system_capex_USD * (1 - grant_percentage)
+        series = _run_cashflow_batch(
+            annual_OM_VOM, annual_electricity_sales, annual_electricity_purchases, system_augment,
+            np.ascontiguousarray(depreciation_values), np.ascontiguousarray(tax), np.ascontiguousarray(insurance),
+            np.ascontiguousarray(property_tax), capex_net, capex_net * (1 - ITC), analysis_period
+        )
+        annual_cash_flow = series[:, 5]
+
+        # Calculate IRR and TLCC
+        NPV_cash_flow = npv(annual_cash_flow)
+        IRR = npf.irr(annual_cash_flow)
+
+        # LCOE calculation
+        LCOE_real_USD_kWh_AT = annual_ARR_AT * annuity_factor / NPV_Energy_N
+        LCOE_real_USD_kWh_BT = annual_ARR_BT * annuity_factor / NPV_Energy_N
+
+        # Calculate payback period as the first year the investment is recovered
+        initial_investment = -annual_cash_flow[:, 0]
+        cumulative_cash_flow = np.zeros((K, T), dtype=np.float64)
+        np.cumsum(annual_cash_flow[:, 1:], axis=1, out=cumulative_cash_flow[:, 1:])
+        recovered = cumulative_cash_flow >= initial_investment[:, None]
+        payback_period = np.where(recovered.any(axis=1), np.argmax(recovered, axis=1), np.nan)
+
+        metrics['PVD'] = PVD
+        metrics['FCR_AT'] = FCR_after_tax_deduction
+        metrics['FCR_BT'] = FCR_before_tax_revenue_required
+        metrics['CRF'] = CRF
+        metrics['NPV_cash_flow'] = NPV_cash_flow
+        metrics['IRR'] = IRR
+        metrics['payback_period'] = payback_period
+        metrics['LCOE_real_USD_kWh_BT'] = LCOE_real_USD_kWh_BT
+        metrics['LCOE_real_USD_kWh_AT'] = LCOE_real_USD_kWh_AT
+        return metrics
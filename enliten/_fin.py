@@ -0,0 +1,183 @@
+"""
+Small financial helpers used by the TEA module, in place of numpy_financial.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, the kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+
+def npv(rate, values):
+    """
+    Net present value of a cash flow series, starting at year 0.
+
+    Parameters:
+    - rate: Discount rate per period.
+    - values: Cash flows for each period. [USD]
+
+    Returns:
+    - NPV of the cash flows. [USD]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return values @ np.power(1.0 + rate, -np.arange(values.size))
+
+
+def irr(values, guess=0.1, tol=1e-9, maxiter=100):
+    """
+    Internal rate of return of a cash flow series, starting at year 0.
+
+    Parameters:
+    - values: Cash flows for each period, or a 2-D array with one cash flow series per row. [USD]
+    - guess: Starting rate for the iteration.
+    - tol: Convergence tolerance on the rate step.
+    - maxiter: Maximum number of iterations.
+
+    Returns:
+    - Rate closest to zero at which the NPV of the cash flows is zero, as numpy_financial.irr
+      returns, or nan if none is found. An array with one rate per row when values is 2-D.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    # Diverging iterations end in nan, silence the floating point warnings they raise without numba
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        if values.ndim == 2:
+            return _irr_batch(values, float(guess), float(tol), int(maxiter))
+        return _irr(values, float(guess), float(tol), int(maxiter))
+
+
+@njit(cache=True)
+def _irr(cash_flows, guess, tol, maxiter):
+    """
+    IRR closest to zero, see irr.
+
+    Newton's method finds a root quickly, but NPV = 0 can have several solutions when the cash
+    flows change sign more than once (e.g. large augmentation years). The rates closer to zero
+    than that root are then scanned for a sign change of the NPV on both sides of zero.
+    """
+    # NPV is a polynomial in x = 1 / (1 + rate), track its sign changes (Descartes' rule of signs
+    # bounds the number of roots) and the first and last nonzero coefficients
+    sign_changes = 0
+    first = 0.0
+    last = 0.0
+    for value in cash_flows:
+        if value != 0.0:
+            if last != 0.0 and (value < 0.0) != (last < 0.0):
+                sign_changes += 1
+            if first == 0.0:
+                first = value
+            last = value
+    if sign_changes == 0:
+        return np.nan  # A root needs cash flows of both signs
+
+    rate = _irr_newton(cash_flows, guess, tol, maxiter)
+    if sign_changes == 1 and np.isfinite(rate):
+        return rate  # The only root
+
+    # Cauchy bounds on the roots in x limit how far the scan goes on each side of zero
+    largest = np.max(np.abs(cash_flows))
+    best = abs(rate) if np.isfinite(rate) else np.inf
+    for direction, max_log_rate in ((1.0, np.log1p(largest / abs(first))), (-1.0, np.log1p(largest / abs(last)))):
+        candidate = _nearest_root(cash_flows, direction, best, tol, max_log_rate)
+        if abs(candidate) < best:  # False for nan
+            rate = candidate
+            best = abs(candidate)
+    return rate if best < np.inf else np.nan
+
+
+@njit(cache=True, parallel=True)
+def _irr_batch(cash_flows, guess, tol, maxiter):
+    """
+    _irr applied to each row of a 2-D array of cash flow series, in parallel.
+    """
+    rates = np.empty(cash_flows.shape[0], dtype=np.float64)
+    for k in prange(cash_flows.shape[0]):
+        rates[k] = _irr(cash_flows[k], guess, tol, maxiter)
+    return rates
+
+
+@njit(cache=True)
+def _present_value(cash_flows, rate):
+    """
+    NPV of the cash flows at a single rate, by Horner's rule in the discount factor.
+    """
+    x = 1.0 / (1.0 + rate)
+    value = 0.0
+    for t in range(cash_flows.size - 1, -1, -1):
+        value = value * x + cash_flows[t]
+    return value
+
+
+@njit(cache=True)
+def _nearest_root(cash_flows, direction, limit, tol, max_log_rate, step=1e-2):
+    """
+    Root of the NPV nearest to zero on one side of zero with abs(rate) < limit, or nan.
+
+    Rates expm1(direction * k * step) are scanned outward from zero up to
+    abs(log(1 + rate)) = max_log_rate, so the grid is uniform in log(1 + rate). The first
+    bracketed sign change is refined by bisection.
+    """
+    lo = 0.0
+    f_lo = _present_value(cash_flows, lo)
+    if f_lo == 0.0:
+        return 0.0
+    k = 1
+    log_rate = 0.0
+    while log_rate < max_log_rate and abs(lo) < limit:
+        log_rate = min(k * step, max_log_rate)  # The last step lands on the bound itself
+        hi = np.expm1(direction * log_rate)
+        f_hi = _present_value(cash_flows, hi)
+        if f_hi == 0.0:
+            return hi
+        if (f_hi < 0.0) != (f_lo < 0.0):
+            for _ in range(200):
+                if abs(hi - lo) <= tol:
+                    break
+                mid = 0.5 * (lo + hi)
+                f_mid = _present_value(cash_flows, mid)
+                if f_mid == 0.0:
+                    return mid
+                if (f_mid < 0.0) == (f_lo < 0.0):
+                    lo, f_lo = mid, f_mid
+                else:
+                    hi = mid
+            return 0.5 * (lo + hi)
+        lo, f_lo = hi, f_hi
+        k += 1
+    return np.nan
+
+
+@njit(cache=True)
+def _irr_newton(cash_flows, guess=0.1, tol=1e-9, maxiter=100):
+    """
+    Internal rate of return of a cash flow series found by Newton's method on its NPV.
+
+    Parameters:
+    - cash_flows: Float64 array of cash flows, starting at year 0. [USD]
+    - guess: Starting rate for the iteration.
+    - tol: Convergence tolerance on the rate step.
+    - maxiter: Maximum number of iterations.
+
+    Returns:
+    - Rate at which the NPV of the cash flows is zero, or nan if the iteration does not converge.
+    """
+    t = np.arange(cash_flows.size).astype(np.float64)
+    rate = guess
+    for _ in range(maxiter):
+        if not rate > -1.0:
+            return np.nan
+        discounted = cash_flows * (1.0 + rate) ** -t
+        present_value = np.sum(discounted)
+        derivative = -np.sum(t * discounted) / (1.0 + rate)
+        if derivative == 0.0 or not np.isfinite(derivative):
+            return np.nan
+        step = present_value / derivative
+        rate -= step
+        if abs(step) < tol:
+            return rate
+    return np.nan